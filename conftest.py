@@ -0,0 +1,73 @@
+import os
+
+# Tests build their own schema in memory; keep the app away from stockguard.db.
+os.environ["STOCKGUARD_INIT_DB"] = "0"
+os.environ["STOCKGUARD_WATCH_WRITES"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import StaticPool
+
+import main
+
+# Shared-cache in-memory database: no files, no fsync. StaticPool keeps the
+# single connection (and with it the database) alive for the whole session.
+TEST_DATABASE_URL = "sqlite+aiosqlite:///file:memdb?mode=memory&cache=shared&uri=true"
+
+test_engine = create_async_engine(TEST_DATABASE_URL, poolclass=StaticPool)
+
+# The sqlite3 driver defers BEGIN on its own, which breaks SAVEPOINTs; let
+# SQLAlchemy emit BEGIN itself so the per-test rollback really undoes writes.
+@event.listens_for(test_engine.sync_engine, "connect")
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+@event.listens_for(test_engine.sync_engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    One test client for the whole run. Entering it keeps a single event loop
+    alive, which every async call against the test engine must run on.
+    """
+    with TestClient(main.app) as test_client:
+        test_client.portal.call(_create_schema)
+        yield test_client
+        test_client.portal.call(test_engine.dispose)
+
+async def _create_schema():
+    async with test_engine.begin() as conn:
+        await conn.run_sync(main.create_schema)
+
+@pytest.fixture(autouse=True)
+def db_transaction(client):
+    """
+    Run each test inside a transaction that is rolled back afterwards.
+    Endpoint commits only release a SAVEPOINT, so nothing leaks between tests.
+    """
+    conn = client.portal.call(test_engine.connect)
+    trans = client.portal.call(conn.begin)
+
+    async def override_get_db():
+        async with AsyncSession(
+            bind=conn,
+            join_transaction_mode="create_savepoint",
+            autoflush=False,
+            expire_on_commit=False,
+        ) as db:
+            yield db
+
+    main.app.dependency_overrides[main.get_db] = override_get_db
+    yield
+    main.app.dependency_overrides.pop(main.get_db, None)
+
+    client.portal.call(trans.rollback)
+    client.portal.call(conn.close)
+
+    # Rolled-back writes never reach the cache invalidation hooks.
+    main.item_cache.invalidate()
+    main._mark_write()
@@ -1,17 +1,69 @@
-from fastapi import FastAPI, HTTPException, Depends
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from itertools import count
+import aiosqlite
+import orjson
+from dogpile.cache import make_region
+from dogpile.cache.api import NO_VALUE
+from fastapi import FastAPI, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
-from sqlalchemy import create_engine, Column, Integer, String, Float
-from sqlalchemy.orm import sessionmaker, Session, declarative_base
+from sqlalchemy import bindparam, delete, event, func, insert, select, Column, Integer, String, Float
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, async_scoped_session
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.schema import CreateIndex, CreateTable
 
 # --- DATABASE SETUP ---
-SQLALCHEMY_DATABASE_URL = "sqlite:///./stockguard.db"
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./stockguard.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+# Create missing tables/indexes on startup. Off by default so regular (and
+# multi-worker) boots skip the DDL and its schema lock; set STOCKGUARD_INIT_DB=1
+# for a first run or in local development.
+INIT_DB = os.getenv("STOCKGUARD_INIT_DB", "0") == "1"
+
+# Watch the database for commits made by other connections (other workers or
+# processes, outside tools) and expire the report/count caches when one
+# happens. Only disable this when this single process is the database's sole
+# writer.
+WATCH_EXTERNAL_WRITES = os.getenv("STOCKGUARD_WATCH_WRITES", "1") == "1"
+
+# Explicitly sized pool so requests reuse warm connections instead of
+# queueing up behind the driver under concurrent load. Connections are kept
+# open for the life of the process: a local SQLite file has no server-side
+# timeout to ping or recycle against, and each connection keeps its page cache.
+# SQLite serializes writers anyway, so each worker keeps a small fixed pool.
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=4,
+    max_overflow=0,
+    pool_timeout=30,
+    query_cache_size=1200,
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune every new SQLite connection: WAL lets readers run alongside a writer,
+    and synchronous=NORMAL is the safe companion setting for WAL.
+    """
+    cursor = dbapi_connection.cursor()
+    # Wait for a competing writer (e.g. another worker) instead of failing.
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB
+    cursor.close()
+
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 # --- SQLALCHEMY MODELS (Tables) ---
@@ -23,12 +75,36 @@ class DBItem(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
-    quantity = Column(Integer)
+    quantity = Column(Integer, index=True)
     price = Column(Float)
     description = Column(String, nullable=True)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# --- PREBUILT STATEMENTS ---
+# Built once at import so each request only binds parameters and hits the
+# engine's compiled-statement cache instead of constructing a new query.
+# Reads select from the Core table, returning plain tuples in column order and
+# skipping ORM object construction and the identity map.
+_ITEM_COLUMNS = tuple(DBItem.__table__.columns)
+_GET_ITEM_STMT = select(DBItem.__table__).where(DBItem.id == bindparam("id"))
+_LOW_STOCK_STMT = select(DBItem.__table__).where(DBItem.quantity < bindparam("threshold"))
+_ALL_STMT = select(DBItem.__table__)
+_COUNT_STMT = select(func.count()).select_from(DBItem.__table__)
+# Native SQLite UPSERT: inserts the row or overwrites every non-key column
+# in one statement. Also usable with a list of parameter sets (executemany).
+_upsert = sqlite_insert(DBItem.__table__)
+_UPSERT_ITEM_STMT = _upsert.on_conflict_do_update(
+    index_elements=[DBItem.id],
+    set_={
+        column.name: _upsert.excluded[column.name]
+        for column in _ITEM_COLUMNS
+        if not column.primary_key
+    },
+).returning(*_ITEM_COLUMNS)
+_DELETE_ITEM_STMT = (
+    delete(DBItem)
+    .where(DBItem.id == bindparam("id"))
+    .execution_options(synchronize_session=False)
+)
 
 # --- PYDANTIC MODELS (Validation) ---
 class ItemCreate(BaseModel):
@@ -43,30 +119,286 @@ class ItemResponse(ItemCreate):
     # New Pydantic V2 configuration to silence warnings
     model_config = ConfigDict(from_attributes=True)
 
+# --- SERIALIZATION ---
+def _field_expression(column, index: int) -> str:
+    """
+    Source for reading one column from a row. Float columns are coerced
+    because SQLite hands back whole-number REAL values as ints via RETURNING.
+    """
+    value = f"row[{index}]"
+    if isinstance(column.type, Float):
+        if column.nullable:
+            return f"(None if {value} is None else float({value}))"
+        return f"float({value})"
+    return value
+
+def _compile_row_serializer(columns):
+    """
+    Generate `def _serialize_row(row): return {"id": row[0], ...}` for the
+    given columns, so rows become dicts without loops or attribute lookups.
+    """
+    fields = ", ".join(
+        f"{column.name!r}: {_field_expression(column, i)}" for i, column in enumerate(columns)
+    )
+    namespace = {}
+    exec(f"def _serialize_row(row):\n    return {{{fields}}}\n", namespace)
+    return namespace["_serialize_row"]
+
+_serialize_row = _compile_row_serializer(_ITEM_COLUMNS)
+
+def _rows_to_json(rows) -> bytes:
+    """
+    Encode item rows as a JSON array, bypassing per-row Pydantic validation
+    for list endpoints.
+    """
+    return orjson.dumps(list(map(_serialize_row, rows)))
+
+ITEM_STREAM_BATCH = 1000
+
+async def _stream_items_json(db: AsyncSession):
+    """
+    Yield the full item list as a JSON array, one batch of rows at a time,
+    so memory stays bounded by the batch size rather than the table size.
+    """
+    result = await db.stream(_ALL_STMT.execution_options(yield_per=ITEM_STREAM_BATCH))
+    yield b"["
+    first = True
+    async for rows in result.partitions():
+        # Strip the surrounding brackets so batches splice into one array.
+        chunk = _rows_to_json(rows)[1:-1]
+        if not first:
+            yield b","
+        yield chunk
+        first = False
+    yield b"]"
+
+# --- ITEM CACHE ---
+# dogpile.cache region holding items by ID as plain dicts, so cached entries
+# never hold on to a session. This process's write endpoints evict the affected
+# item after committing; writes made by other processes are only picked up when
+# the entry expires after a minute. The memory backend is bounded by an LRU
+# dict; pointing the region at memcached or Redis instead shares it (and its
+# evictions) between processes.
+ITEM_CACHE_SIZE = 4096
+ITEM_CACHE_TTL = 60
+
+class _LRUDict(OrderedDict):
+    """Mapping that evicts its least recently used key beyond maxsize."""
+
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+item_cache = make_region().configure(
+    "dogpile.cache.memory",
+    expiration_time=ITEM_CACHE_TTL,
+    arguments={"cache_dict": _LRUDict(ITEM_CACHE_SIZE)},
+)
+
+# Bumped by every eviction, so a read that an eviction overtook is not cached.
+_item_evictions = 0
+
+def _item_cache_key(item_id: int) -> str:
+    return f"DBItem:{item_id}"
+
+def _evict_item(item_id: int):
+    """Call after committing a change to one item."""
+    global _item_evictions
+    _item_evictions += 1
+    item_cache.delete(_item_cache_key(item_id))
+
+async def _fetch_item(db: AsyncSession, item_id: int) -> Optional[dict]:
+    """
+    Return the item as a dict, or None if it does not exist.
+    Only hits the database on a cache miss; missing IDs are not cached.
+    """
+    key = _item_cache_key(item_id)
+    cached = item_cache.get(key)
+    if cached is not NO_VALUE:
+        return cached
+
+    # A write committed while the SELECT was in flight may already have
+    # evicted this key; only cache the row if no eviction happened meanwhile.
+    evictions = _item_evictions
+    row = (await db.execute(_GET_ITEM_STMT, {"id": item_id})).first()
+    if row is None:
+        return None
+
+    data = _serialize_row(row)
+    if evictions == _item_evictions:
+        item_cache.set(key, data)
+    return data
+
+# --- REPORT CACHE ---
+# Serialized low-stock reports keyed by (threshold, write epoch). Every
+# committed write bumps the epoch, so stale bodies are simply never looked up
+# again and age out of the LRU.
+LOW_STOCK_CACHE_SIZE = 64
+_low_stock_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+_write_epoch = 0
+
+def _mark_write():
+    """Call after committing a change to the items table."""
+    global _write_epoch, _next_watch_check
+    if _watcher is None:
+        _write_epoch += 1
+    else:
+        # The watcher sees this commit as well; have the next read check now
+        # instead of bumping the epoch twice for one write.
+        _next_watch_check = 0.0
+
+async def _low_stock_json(db: AsyncSession, threshold: int) -> bytes:
+    """Return the JSON body of the low-stock report for the given threshold."""
+    await _sync_write_epoch()
+    key = (threshold, _write_epoch)
+    cached = _low_stock_cache.get(key)
+    if cached is not None:
+        _low_stock_cache.move_to_end(key)
+        return cached
+
+    rows = (await db.execute(_LOW_STOCK_STMT, {"threshold": threshold})).all()
+    body = _rows_to_json(rows)
+    _low_stock_cache[key] = body
+    if len(_low_stock_cache) > LOW_STOCK_CACHE_SIZE:
+        _low_stock_cache.popitem(last=False)
+    return body
+
+# Total item count, cached as (write epoch, count).
+_item_count = (-1, 0)
+
+async def _count_items(db: AsyncSession) -> int:
+    """Return the number of items, querying only after a write."""
+    global _item_count
+    await _sync_write_epoch()
+    epoch = _write_epoch
+    if _item_count[0] != epoch:
+        total = (await db.execute(_COUNT_STMT)).scalar_one()
+        _item_count = (epoch, total)
+    return _item_count[1]
+
+# --- CROSS-PROCESS INVALIDATION ---
+# The epoch caches above would otherwise only see writes made by this process.
+# While enabled, each process keeps one extra connection watching PRAGMA
+# data_version, which changes whenever any other connection (including this
+# process's own pool) commits, and the watcher alone advances the write epoch.
+# The check runs at most once per WATCH_INTERVAL seconds, except right after a
+# local write, so other processes' writes show up within that interval.
+WATCH_INTERVAL = 0.5
+_watcher: Optional[aiosqlite.Connection] = None
+_seen_data_version = None
+_next_watch_check = 0.0
+
+async def _sync_write_epoch():
+    """Advance the write epoch if the database changed since the last check."""
+    global _seen_data_version, _next_watch_check, _write_epoch
+    if _watcher is None:
+        return
+    now = time.monotonic()
+    if now < _next_watch_check:
+        return
+    # Set before awaiting so a local write landing meanwhile can reset it.
+    _next_watch_check = now + WATCH_INTERVAL
+    async with _watcher.execute("PRAGMA data_version") as cursor:
+        (version,) = await cursor.fetchone()
+    if version != _seen_data_version:
+        _seen_data_version = version
+        _write_epoch += 1
+
 # --- DEPENDENCY ---
-def get_db():
-    db = SessionLocal()
+# One session per HTTP request, shared by every dependency and helper that runs
+# for it. Only ORM queries benefit from the shared identity map; the Core reads
+# above return plain rows and bypass it.
+_request_id: ContextVar[Optional[int]] = ContextVar("request_id", default=None)
+_request_ids = count()
+
+ScopedSession = async_scoped_session(SessionLocal, scopefunc=_request_id.get)
+
+class RequestScopeMiddleware:
+    """ASGI middleware that tags each HTTP request with a unique ID."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _request_id.set(next(_request_ids))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_id.reset(token)
+
+async def get_db():
+    if _request_id.get() is None:
+        # Outside RequestScopeMiddleware there is no request to scope to, and
+        # concurrent callers would otherwise share one None-keyed session.
+        async with SessionLocal() as db:
+            yield db
+        return
     try:
-        yield db
+        yield ScopedSession()
     finally:
-        db.close()
+        await ScopedSession.remove()
 
 # --- API APP ---
+def create_schema(connection):
+    """
+    Create missing tables and indexes. IF NOT EXISTS keeps this safe when
+    several workers start at once, and still adds indexes declared after the
+    table was first created.
+    """
+    for table in Base.metadata.sorted_tables:
+        connection.execute(CreateTable(table, if_not_exists=True))
+        for index in table.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the schema on startup (if enabled), start watching for external
+    writes (if enabled), and release connections on shutdown.
+    """
+    global _watcher
+    if INIT_DB:
+        async with engine.begin() as conn:
+            await conn.run_sync(create_schema)
+    if WATCH_EXTERNAL_WRITES:
+        _watcher = await aiosqlite.connect(engine.url.database)
+    yield
+    if _watcher is not None:
+        await _watcher.close()
+        _watcher = None
+    await engine.dispose()
+
 app = FastAPI(
     title="StockGuard API",
     description="Warehouse management system with SQLite database",
-    version="1.2.0"
+    version="1.2.0",
+    lifespan=lifespan
 )
+app.add_middleware(RequestScopeMiddleware)
 
 # --- ENDPOINTS ---
 
 @app.get("/")
-def read_root():
+async def read_root():
     """Health check endpoint."""
     return {"message": "Welcome to StockGuard API - System is running"}
 
 @app.post("/items", response_model=ItemResponse)
-def create_item(item: ItemCreate, db: Session = Depends(get_db)):
+async def create_item(item: ItemCreate, db: AsyncSession = Depends(get_db)):
     """Create a new item in the database."""
     db_item = DBItem(
         name=item.name, 
@@ -75,38 +407,77 @@ def create_item(item: ItemCreate, db: Session = Depends(get_db)):
         description=item.description
     )
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    # The flush inside commit() fills db_item.id from lastrowid, and
+    # expire_on_commit=False keeps the other attributes loaded.
+    await db.commit()
+    _mark_write()
     return db_item
 
-@app.get("/items", response_model=List[ItemResponse])
-def get_all_items(db: Session = Depends(get_db)):
+@app.post("/items/bulk", response_model=List[ItemResponse])
+async def create_items_bulk(items: List[ItemCreate], db: AsyncSession = Depends(get_db)):
+    """
+    Create many items with a single multi-row INSERT and one commit.
+    Returns the created items in the order they were sent.
+    """
+    if not items:
+        return Response(content=b"[]", media_type="application/json")
+
+    # One multi-row VALUES statement. RETURNING order is not guaranteed, but
+    # new rowids follow the VALUES order, so sorting by id restores it.
+    stmt = insert(DBItem).returning(*_ITEM_COLUMNS)
+    rows = (await db.execute(stmt, [item.model_dump() for item in items])).all()
+    rows.sort(key=lambda row: row[0])
+    await db.commit()
+    _mark_write()
+    return Response(content=_rows_to_json(rows), media_type="application/json")
+
+# Read endpoints return pre-built JSON, so the schema is only declared for the
+# OpenAPI docs and FastAPI does not re-validate the payload.
+@app.get("/items", response_model=None, responses={200: {"model": List[ItemResponse]}})
+async def get_all_items(db: AsyncSession = Depends(get_db)):
     """Retrieve all items."""
-    return db.query(DBItem).all()
+    return StreamingResponse(_stream_items_json(db), media_type="application/json")
+
+# Declared before /items/{item_id} so "count" is not parsed as an ID.
+@app.get("/items/count")
+async def count_items(db: AsyncSession = Depends(get_db)):
+    """Return the total number of items without fetching them."""
+    return {"count": await _count_items(db)}
 
-@app.get("/items/{item_id}", response_model=ItemResponse)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@app.get("/items/{item_id}", response_model=None, responses={200: {"model": ItemResponse}})
+async def get_item(item_id: int, db: AsyncSession = Depends(get_db)):
     """Retrieve a specific item by ID."""
-    item = db.query(DBItem).filter(DBItem.id == item_id).first()
+    item = await _fetch_item(db, item_id)
     if item is None:
         raise HTTPException(status_code=404, detail="Item not found")
-    return item
+    return Response(content=orjson.dumps(item), media_type="application/json")
+
+@app.put("/items/{item_id}", response_model=None, responses={200: {"model": ItemResponse}})
+async def upsert_item(item_id: int, item: ItemCreate, db: AsyncSession = Depends(get_db)):
+    """Create or replace the item with the given ID."""
+    result = await db.execute(_UPSERT_ITEM_STMT, {"id": item_id, **item.model_dump()})
+    row = result.one()
+    await db.commit()
+    _evict_item(item_id)
+    _mark_write()
+    return Response(content=orjson.dumps(_serialize_row(row)), media_type="application/json")
 
 @app.delete("/items/{item_id}")
-def delete_item(item_id: int, db: Session = Depends(get_db)):
+async def delete_item(item_id: int, db: AsyncSession = Depends(get_db)):
     """Delete an item."""
-    item = db.query(DBItem).filter(DBItem.id == item_id).first()
-    if item is None:
+    result = await db.execute(_DELETE_ITEM_STMT, {"id": item_id})
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Item not found")
-    
-    db.delete(item)
-    db.commit()
+
+    await db.commit()
+    _evict_item(item_id)
+    _mark_write()
     return {"message": "Item deleted successfully"}
 
-@app.get("/reports/low-stock", response_model=List[ItemResponse])
-def get_low_stock_items(threshold: int = 10, db: Session = Depends(get_db)):
+@app.get("/reports/low-stock", response_model=None, responses={200: {"model": List[ItemResponse]}})
+async def get_low_stock_items(threshold: int = 10, db: AsyncSession = Depends(get_db)):
     """
     Returns items with quantity below the threshold.
     """
-    low_stock_items = db.query(DBItem).filter(DBItem.quantity < threshold).all()
-    return low_stock_items
\ No newline at end of file
+    body = await _low_stock_json(db, threshold)
+    return Response(content=body, media_type="application/json")
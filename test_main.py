@@ -1,16 +1,22 @@
+import sqlite3
+from types import SimpleNamespace
+
+import aiosqlite
+from dogpile.cache.api import NO_VALUE
+from fastapi import Depends, FastAPI
 from fastapi.testclient import TestClient
-from main import app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
-# Create a test client
-client = TestClient(app)
+import main
 
-def test_read_root():
+def test_read_root(client):
     """Check if the root endpoint works (status 200)."""
     response = client.get("/")
     assert response.status_code == 200
     assert response.json() == {"message": "Welcome to StockGuard API - System is running"}
 
-def test_create_item():
+def test_create_item(client):
     """Test creating a new item."""
     item_payload = {
         "name": "Test Laptop",
@@ -29,7 +35,7 @@ def test_create_item():
     assert data["name"] == "Test Laptop"
     assert "id" in data
 
-def test_read_item():
+def test_read_item(client):
     """
     Test scenario: Create item -> Retrieve it by ID
     """
@@ -45,4 +51,257 @@ def test_read_item():
     get_response = client.get(f"/items/{item_id}")
     
     assert get_response.status_code == 200
-    assert get_response.json()["name"] == "Unique Scanner"
\ No newline at end of file
+    assert get_response.json()["name"] == "Unique Scanner"
+
+def test_deleted_item_is_not_served_from_cache(client):
+    """
+    Test scenario: Read item (fills cache) -> Delete it -> Read again gives 404
+    """
+    item_id = client.post("/items", json={
+        "name": "Pallet Jack",
+        "quantity": 2,
+        "price": 450.0
+    }).json()["id"]
+
+    assert client.get(f"/items/{item_id}").status_code == 200
+    assert client.delete(f"/items/{item_id}").status_code == 200
+    assert client.get(f"/items/{item_id}").status_code == 404
+
+def test_low_stock_report_reflects_new_items(client):
+    """
+    Test scenario: Read report -> Create low-stock item -> Report includes it
+    """
+    before = client.get("/reports/low-stock", params={"threshold": 3}).json()
+
+    item_id = client.post("/items", json={
+        "name": "Barcode Labels",
+        "quantity": 0,
+        "price": 12.5
+    }).json()["id"]
+
+    after = client.get("/reports/low-stock", params={"threshold": 3}).json()
+    assert len(after) == len(before) + 1
+    assert item_id in [item["id"] for item in after]
+
+def test_create_items_bulk(client):
+    """Test creating several items in one request."""
+    payload = [
+        {"name": "Shelf A", "quantity": 4, "price": 80.0},
+        {"name": "Shelf B", "quantity": 6, "price": 95.0, "description": "Heavy duty"},
+    ]
+
+    response = client.post("/items/bulk", json=payload)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["name"] for item in data] == ["Shelf A", "Shelf B"]
+    assert data[1]["description"] == "Heavy duty"
+    assert client.get(f"/items/{data[0]['id']}").json()["name"] == "Shelf A"
+
+def test_create_items_bulk_uses_one_insert(client):
+    """Bulk create sends a single INSERT and keeps the request order."""
+    inserts = []
+
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT"):
+            inserts.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", count_inserts)
+    try:
+        response = client.post("/items/bulk", json=[
+            {"name": f"Bin {n}", "quantity": n, "price": 1.0} for n in range(5)
+        ])
+    finally:
+        event.remove(Engine, "before_cursor_execute", count_inserts)
+
+    assert response.status_code == 200
+    assert len(inserts) == 1
+    assert [item["name"] for item in response.json()] == [f"Bin {n}" for n in range(5)]
+
+def test_upsert_item(client):
+    """
+    Test scenario: PUT a new ID (creates) -> PUT it again (replaces)
+    """
+    item_id = client.post("/items", json={
+        "name": "Forklift Battery",
+        "quantity": 3,
+        "price": 700.0
+    }).json()["id"] + 100
+
+    created = client.put(f"/items/{item_id}", json={
+        "name": "Stretch Film",
+        "quantity": 40,
+        "price": 9.5
+    })
+    assert created.status_code == 200
+    assert created.json()["id"] == item_id
+
+    # Read it once so the replaced version must also evict the cached copy
+    assert client.get(f"/items/{item_id}").json()["quantity"] == 40
+
+    replaced = client.put(f"/items/{item_id}", json={
+        "name": "Stretch Film",
+        "quantity": 5,
+        "price": 9.5,
+        "description": "Restock soon"
+    })
+    assert replaced.status_code == 200
+    item = client.get(f"/items/{item_id}").json()
+    assert item["quantity"] == 5
+    assert item["description"] == "Restock soon"
+
+def test_count_items(client):
+    """
+    Test scenario: Read count -> Create item -> Count goes up by one
+    """
+    before = client.get("/items/count").json()["count"]
+
+    client.post("/items", json={
+        "name": "Cable Ties",
+        "quantity": 500,
+        "price": 0.05
+    })
+
+    assert client.get("/items/count").json() == {"count": before + 1}
+
+def test_item_read_overtaken_by_write_is_not_cached(client):
+    """
+    A reader that misses the cache and is overtaken by a committed write
+    must not put the row it read back into the cache.
+    """
+    item_id = 424242
+    stale_row = (item_id, "Old Name", 5, 2.0, None)
+
+    class WriteDuringSelect:
+        async def execute(self, stmt, params):
+            # A concurrent delete commits while this SELECT is in flight
+            main._evict_item(item_id)
+            return SimpleNamespace(first=lambda: stale_row)
+
+    client.portal.call(main._fetch_item, WriteDuringSelect(), item_id)
+
+    assert main.item_cache.get(main._item_cache_key(item_id)) is NO_VALUE
+
+def test_watcher_advances_epoch_once_per_write(client, tmp_path, monkeypatch):
+    """
+    Test scenario: Watch a database file -> Another connection commits ->
+    The write epoch moves once the check interval allows, exactly once per
+    write, and the item cache is left alone
+    """
+    db_path = tmp_path / "shared.db"
+    writer = sqlite3.connect(db_path, isolation_level=None)
+    writer.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+
+    watcher = client.portal.call(aiosqlite.connect, str(db_path))
+    monkeypatch.setattr(main, "_watcher", watcher)
+    monkeypatch.setattr(main, "_seen_data_version", None)
+    monkeypatch.setattr(main, "_next_watch_check", 0.0)
+    monkeypatch.setattr(main, "WATCH_INTERVAL", 60)
+    try:
+        client.portal.call(main._sync_write_epoch)
+        key = main._item_cache_key(1)
+        main.item_cache.set(key, {"id": 1})
+        epoch = main._write_epoch
+
+        # Another process commits, but the interval has not elapsed yet
+        writer.execute("INSERT INTO items (id) VALUES (1)")
+        client.portal.call(main._sync_write_epoch)
+        assert main._write_epoch == epoch
+
+        # Once it has, the next check picks the write up
+        main._next_watch_check = 0.0
+        client.portal.call(main._sync_write_epoch)
+        assert main._write_epoch == epoch + 1
+
+        # A local write only schedules an immediate check, so the watcher
+        # counts it once instead of both mechanisms bumping the epoch
+        writer.execute("INSERT INTO items (id) VALUES (2)")
+        main._mark_write()
+        assert main._write_epoch == epoch + 1
+        client.portal.call(main._sync_write_epoch)
+        assert main._write_epoch == epoch + 2
+
+        # Cross-process changes never flush the item cache wholesale
+        assert main.item_cache.get(key) == {"id": 1}
+    finally:
+        client.portal.call(watcher.close)
+        writer.close()
+
+def test_written_prices_are_returned_as_floats(client):
+    """Whole-number prices come back as floats from PUT and bulk create."""
+    created = client.post("/items/bulk", json=[
+        {"name": "Tape Gun", "quantity": 8, "price": 3},
+    ]).json()[0]
+    item_id = created["id"]
+
+    bulk_price = created["price"]
+    put_price = client.put(f"/items/{item_id}", json={
+        "name": "Tape Gun",
+        "quantity": 8,
+        "price": 4
+    }).json()["price"]
+
+    assert isinstance(bulk_price, float)
+    assert isinstance(put_price, float)
+
+def test_get_db_shares_one_session_per_request():
+    """
+    The real get_db hands every dependency in a request the same scoped
+    session, a new one per request, and removes it when the request ends.
+    """
+    probe = FastAPI()
+    probe.add_middleware(main.RequestScopeMiddleware)
+    sessions = []
+
+    # use_cache=False makes FastAPI run get_db twice within one request
+    @probe.get("/probe")
+    async def probe_sessions(
+        first=Depends(main.get_db, use_cache=False),
+        second=Depends(main.get_db, use_cache=False),
+    ):
+        sessions.append((first, second))
+        return {}
+
+    with TestClient(probe) as probe_client:
+        probe_client.get("/probe")
+        assert len(main.ScopedSession.registry.registry) == 0
+        probe_client.get("/probe")
+        assert len(main.ScopedSession.registry.registry) == 0
+
+    (first_a, first_b), (second_a, second_b) = sessions
+    assert first_a is first_b
+    assert second_a is second_b
+    assert first_a is not second_a
+
+def test_get_db_outside_a_request_uses_its_own_session(client):
+    """Without RequestScopeMiddleware, each get_db call gets a separate session."""
+    async def open_two_sessions():
+        first_gen, second_gen = main.get_db(), main.get_db()
+        first, second = await first_gen.__anext__(), await second_gen.__anext__()
+        await first_gen.aclose()
+        await second_gen.aclose()
+        return first, second
+
+    first, second = client.portal.call(open_two_sessions)
+
+    assert first is not second
+    assert len(main.ScopedSession.registry.registry) == 0
+
+def test_read_all_items_streams_in_batches(client, monkeypatch):
+    """
+    Test scenario: Empty table gives [] -> Items spanning several batches
+    come back as one valid JSON array
+    """
+    monkeypatch.setattr(main, "ITEM_STREAM_BATCH", 2)
+
+    empty = client.get("/items")
+    assert empty.status_code == 200
+    assert empty.json() == []
+
+    created = client.post("/items/bulk", json=[
+        {"name": f"Crate {n}", "quantity": n, "price": 20.0} for n in range(5)
+    ]).json()
+
+    response = client.get("/items")
+    assert response.status_code == 200
+    assert response.json() == created